@@ -36,11 +36,34 @@ Given the actual Door ID and this new method, what is the password? Be extra pro
 """
 from __future__ import print_function
 
+import argparse
+import binascii
 import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import struct
 import sys
+import time
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 PASSCODE_LENGTH = 8
 INTERESTING_HASH = '00000'
+BATCH_SIZE = 10000
+HIT_CACHE_DIR = '.hit_cache'
+HIT_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+HIT_CACHE_MAX_BYTES = 10 * 1024 * 1024
+HIT_CACHE_SAVE_INTERVAL = 30
+# Temporary files older than this are left over from interrupted saves.
+HIT_CACHE_TMP_MAX_AGE = 60 * 60
+STATS_REPORT_INTERVAL = 10
 
 
 def get_md5sum(s, index):
@@ -54,73 +77,754 @@ def get_md5sum(s, index):
     Returns:
         str
     """
-    return hashlib.md5('{}{}'.format(s, index)).hexdigest()
+    return hashlib.md5('{}{}'.format(s, index).encode('ascii')).hexdigest()
 
 
-def find_passcode(door_id):
+def digest_bounds(prefix):
     """
-    Find a passcode using the rules for Part 1.
+    Turn a hex prefix into the range of raw digests which start with
+        it, so digests can be tested without hex encoding them.
+
+    Args:
+        prefix (str):   The hex prefix, e.g. '00000'.
+
+    Returns:
+        tuple - (lowest, highest) digest, as bytes.
+    """
+    return (binascii.unhexlify(prefix.ljust(32, '0')),
+            binascii.unhexlify(prefix.ljust(32, 'f')))
+
+
+def find_interesting(door_id, start, stop):
+    """
+    Hash a range of indexes, keeping only the interesting hashes. The
+        Door ID is hashed once and the hash state copied for each index,
+        and only interesting digests are ever hex encoded.
+
+    Args:
+        door_id (str):  The Door ID to hash.
+        start (int):    First index to hash.
+        stop (int):     Index to stop before.
+
+    Returns:
+        list - Tuples of (index, hashed_id).
+    """
+    lowest, highest = digest_bounds(INTERESTING_HASH)
+    prefix = hashlib.md5(door_id.encode('ascii'))
+    hits = []
+    for i in range(start, stop):
+        md5 = prefix.copy()
+        md5.update(str(i).encode('ascii'))
+        digest = md5.digest()
+        if lowest <= digest <= highest:
+            hits.append((i, binascii.hexlify(digest).decode('ascii')))
+    return hits
+
+
+# Per step rotation amounts and constants for MD5.
+MD5_SHIFTS = ([7, 12, 17, 22] * 4 + [5, 9, 14, 20] * 4 +
+              [4, 11, 16, 23] * 4 + [6, 10, 15, 21] * 4)
+MD5_CONSTANTS = [int(abs(math.sin(i + 1)) * 2 ** 32) & 0xffffffff
+                 for i in range(64)]
+
+
+def _md5_blocks(prefix, indexes, digits):
+    """
+    Build the padded MD5 message block for the prefix followed by each
+        index, all of the indexes having the same number of digits.
+
+    Args:
+        prefix (bytes):     The encoded Door ID.
+        indexes (array):    The indexes to append.
+        digits (int):       Number of digits in every index.
+
+    Returns:
+        array - Of shape (N, 16), the message words for each index.
+    """
+    length = len(prefix) + digits
+    blocks = np.zeros((len(indexes), 64), dtype=np.uint8)
+    blocks[:, :len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+
+    remaining = indexes.copy()
+    for i in range(length - 1, len(prefix) - 1, -1):
+        blocks[:, i] = remaining % 10 + ord('0')
+        remaining //= 10
+
+    blocks[:, length] = 0x80
+    blocks[:, 56:] = np.frombuffer(struct.pack('<Q', length * 8),
+                                   dtype=np.uint8)
+    return blocks.view('<u4')
+
+
+def _md5_first_words(words):
+    """
+    Run the MD5 compression function over a batch of single block
+        messages at once.
+
+    Args:
+        words (array):  Of shape (N, 16), the message words.
+
+    Returns:
+        array - The first word of each digest.
+    """
+    words = [np.ascontiguousarray(words[:, i]) for i in range(16)]
+    a = np.full(len(words[0]), 0x67452301, dtype=np.uint32)
+    b = np.full_like(a, 0xefcdab89)
+    c = np.full_like(a, 0x98badcfe)
+    d = np.full_like(a, 0x10325476)
+
+    for i in range(64):
+        if i < 16:
+            f = (b & c) | (~b & d)
+            g = i
+        elif i < 32:
+            f = (d & b) | (~d & c)
+            g = (5 * i + 1) % 16
+        elif i < 48:
+            f = b ^ c ^ d
+            g = (3 * i + 5) % 16
+        else:
+            f = c ^ (b | ~d)
+            g = (7 * i) % 16
+
+        f = f + a + np.uint32(MD5_CONSTANTS[i]) + words[g]
+        shift = MD5_SHIFTS[i]
+        a, d, c = d, c, b
+        b = b + ((f << np.uint32(shift)) | (f >> np.uint32(32 - shift)))
+
+    return a + np.uint32(0x67452301)
+
+
+def _first_word_test(prefix):
+    """
+    Turn up to the first eight characters of a hex prefix into a mask
+        and value for the first, little endian, word of a digest.
+
+    Args:
+        prefix (str):   The hex prefix, e.g. '00000'.
+
+    Returns:
+        tuple - (mask, value)
+    """
+    mask = value = 0
+    for i, c in enumerate(prefix[:8]):
+        shift = 8 * (i // 2) + (0 if i % 2 else 4)
+        mask |= 0xf << shift
+        value |= int(c, 16) << shift
+    return np.uint32(mask), np.uint32(value)
+
+
+def find_interesting_numpy(door_id, start, stop):
+    """
+    Hash a range of indexes, keeping only the interesting hashes, with
+        MD5 run over arrays of candidates at once. Candidates passing
+        the vectorised test are rehashed with get_md5sum, so hits are
+        exactly those find_interesting would return.
 
     Args:
         door_id (str):  The Door ID to hash.
+        start (int):    First index to hash.
+        stop (int):     Index to stop before.
+
+    Returns:
+        list - Tuples of (index, hashed_id).
+    """
+    if np is None:
+        raise ImportError('numpy is required for the numpy engine')
+
+    prefix = door_id.encode('ascii')
+    mask, value = _first_word_test(INTERESTING_HASH)
+    hits = []
+    while start < stop:
+        # Hash runs of indexes with the same number of digits together.
+        digits = len(str(start))
+        if len(prefix) + digits > 55:
+            raise ValueError('Door ID too long for a single MD5 block')
+        run_stop = min(stop, 10 ** digits)
+
+        indexes = np.arange(start, run_stop, dtype=np.int64)
+        first_words = _md5_first_words(_md5_blocks(prefix, indexes, digits))
+        for i in indexes[(first_words & mask) == value].tolist():
+            hashed_id = get_md5sum(door_id, i)
+            if hashed_id.startswith(INTERESTING_HASH):
+                hits.append((i, hashed_id))
+
+        start = run_stop
+    return hits
+
+
+ENGINES = {
+    'hashlib': find_interesting,
+    'numpy': find_interesting_numpy,
+}
+
+
+def _find_interesting_batch(args):
+    engine, door_id, start, stop = args
+    return ENGINES[engine](door_id, start, stop)
+
+
+def _interesting_batches(door_id, start, engine):
+    find = ENGINES[engine]
+    for i in itertools.count(start, BATCH_SIZE):
+        yield i + BATCH_SIZE, find(door_id, i, i + BATCH_SIZE)
+
+
+def mine_interesting_batches(door_id, processes=None, start=0,
+                             batch_size=BATCH_SIZE, engine='hashlib'):
+    """
+    Hash batches of indexes across a pool of worker processes, yielding
+        each batch's interesting hashes in index order. Only a couple of
+        batches per worker are in flight at a time, and the pool is shut
+        down once the generator is closed.
+
+    Args:
+        door_id (str):      The Door ID to hash.
+        processes (int):    Number of worker processes, None for one
+                                per CPU.
+        start (int):        First index to hash.
+        batch_size (int):   Number of indexes handed out at a time.
+        engine (str):       Name of the hashing engine in ENGINES.
+
+    Yields:
+        tuple - (stop, hits), where stop is the index the batch ended
+            before and hits is a list of (index, hashed_id).
+    """
+    processes = processes or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+    try:
+        batches = ((engine, door_id, i, i + batch_size)
+                   for i in itertools.count(start, batch_size))
+        pending = deque()
+        for batch in itertools.islice(batches, 2 * processes):
+            pending.append((batch[3], pool.apply_async(
+                _find_interesting_batch, (batch,)
+            )))
+
+        while True:
+            stop, hits = pending.popleft()
+            hits = hits.get()
+            batch = next(batches)
+            pending.append((batch[3], pool.apply_async(
+                _find_interesting_batch, (batch,)
+            )))
+            yield stop, hits
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+class MiningStats(object):
+    """
+    Throughput numbers for a search, updated once per batch of indexes
+        so keeping them costs next to nothing. Progress is written to
+        a stream every so often.
+    """
+
+    def __init__(self, stream=None, interval=STATS_REPORT_INTERVAL):
+        """
+        Constructor.
+
+        Args:
+            stream (file):      Where to write progress, None for stderr.
+            interval (int):     Seconds between progress reports.
+        """
+        self.stream = stream
+        self.interval = interval
+        self.start = None
+        self.scanned = 0
+        self.hit_times = []
+        self._started = None
+        self._reported = None
+
+    @property
+    def elapsed(self):
+        if self._started is None:
+            return 0.0
+        return time.time() - self._started
+
+    @property
+    def hashes_per_second(self):
+        elapsed = self.elapsed
+        return self.scanned / elapsed if elapsed else 0.0
+
+    def begin(self, start):
+        """
+        Start timing a scan.
+
+        Args:
+            start (int):    First index the scan hashes.
+        """
+        self.start = start
+        self._started = self._reported = time.time()
+
+    def batch(self, stop, hits):
+        """
+        Record a finished batch. Hits are timed at the end of their batch.
+
+        Args:
+            stop (int):     The index the batch ended before.
+            hits (list):    The batch's interesting (index, hashed_id).
+        """
+        now = time.time()
+        self.scanned = stop - self.start
+        for i, _ in hits:
+            self.hit_times.append((i, now - self._started))
+
+        if now - self._reported >= self.interval:
+            self.report()
+            self._reported = now
+
+    def report(self):
+        """
+        Write a line of progress.
+        """
+        print('{0:,} indexes scanned, {1} hits, {2:,.0f} hashes/sec'.format(
+            self.scanned, len(self.hit_times), self.hashes_per_second
+        ), file=self.stream or sys.stderr)
+
+    def summary(self):
+        """
+        Summarise the scan.
+
+        Returns:
+            dict
+        """
+        return {
+            'start': self.start,
+            'indexes_scanned': self.scanned,
+            'hits': len(self.hit_times),
+            'elapsed': self.elapsed,
+            'hashes_per_second': self.hashes_per_second,
+            'hit_times': [{'index': i, 'seconds': t}
+                          for i, t in self.hit_times],
+        }
+
+
+def _instrumented(batches, stats, start):
+    stats.begin(start)
+    try:
+        for stop, hits in batches:
+            stats.batch(stop, hits)
+            yield stop, hits
+    finally:
+        batches.close()
+
+
+def interesting_batches(door_id, processes=1, start=0, engine='hashlib',
+                        stats=None):
+    """
+    Hash batches of indexes, yielding each batch's interesting hashes
+        in index order.
+
+    Args:
+        door_id (str):      The Door ID to hash.
+        processes (int):    Number of worker processes to hash with.
+                                None uses one per CPU, 1 hashes in
+                                process.
+        start (int):        First index to hash.
+        engine (str):       Name of the hashing engine in ENGINES.
+        stats (MiningStats):    Stats to record the scan in, if any.
+
+    Returns:
+        generator - Of (stop, hits), as mine_interesting_batches.
+    """
+    if processes == 1:
+        batches = _interesting_batches(door_id, start, engine)
+    else:
+        batches = mine_interesting_batches(door_id, processes, start,
+                                           engine=engine)
+
+    if stats is not None:
+        return _instrumented(batches, stats, start)
+    return batches
+
+
+def interesting_hashes(door_id, processes=1, start=0, engine='hashlib',
+                       stats=None):
+    """
+    Generate every interesting hash for a Door ID, in index order.
+
+    Args:
+        door_id (str):      The Door ID to hash.
+        processes (int):    Number of worker processes to hash with.
+                                None uses one per CPU, 1 hashes in
+                                process.
+        start (int):        First index to hash.
+        engine (str):       Name of the hashing engine in ENGINES.
+        stats (MiningStats):    Stats to record the scan in, if any.
+
+    Yields:
+        tuple - (index, hashed_id)
+    """
+    batches = interesting_batches(door_id, processes, start, engine, stats)
+    try:
+        for _, hits in batches:
+            for hit in hits:
+                yield hit
+    finally:
+        batches.close()
+
+
+def _hit_cache_path(cache_dir, door_id):
+    key = '{}\0{}'.format(INTERESTING_HASH, door_id).encode('utf-8')
+    return os.path.join(cache_dir,
+                        '{}.json'.format(hashlib.sha1(key).hexdigest()))
+
+
+def load_hit_cache(cache_dir, door_id):
+    """
+    Load the interesting hashes found so far for a Door ID.
+
+    Args:
+        cache_dir (str):    Directory the cache files live in.
+        door_id (str):      The Door ID that was hashed.
+
+    Returns:
+        tuple - (hits, scanned), hits being a list of (index, hashed_id)
+            and scanned the index scanning stopped before. ([], 0) if
+            nothing is cached.
+    """
+    try:
+        with open(_hit_cache_path(cache_dir, door_id), 'r') as f:
+            cached = json.load(f)
+    except (IOError, OSError, ValueError):
+        return [], 0
+
+    return [tuple(hit) for hit in cached['hits']], cached['scanned']
+
+
+def save_hit_cache(cache_dir, door_id, hits, scanned):
+    """
+    Save the interesting hashes found so far for a Door ID, then prune
+        the cache.
+
+    Args:
+        cache_dir (str):    Directory the cache files live in.
+        door_id (str):      The Door ID that was hashed.
+        hits (list):        Every interesting (index, hashed_id) before
+                                scanned.
+        scanned (int):      The index scanning stopped before.
+    """
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    cache_path = _hit_cache_path(cache_dir, door_id)
+    # Write then rename, so an interrupted save never leaves half a file.
+    tmp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'door_id': door_id,
+            'prefix': INTERESTING_HASH,
+            'hits': hits,
+            'scanned': scanned,
+        }, f)
+    os.rename(tmp_path, cache_path)
+
+    prune_hit_cache(cache_dir, keep=cache_path)
+
+
+def _remove(path):
+    # Another process may have got there first.
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def prune_hit_cache(cache_dir, max_age=HIT_CACHE_MAX_AGE,
+                    max_bytes=HIT_CACHE_MAX_BYTES, keep=None):
+    """
+    Evict cache files older than max_age, then the oldest of the rest
+        until the cache fits in max_bytes. Temporary files left behind
+        by interrupted saves are removed once they're stale, and count
+        towards the size until then.
+
+    Args:
+        cache_dir (str):    Directory the cache files live in.
+        max_age (int):      Oldest a cache file may be, in seconds.
+        max_bytes (int):    Most space the cache files may use.
+        keep (str):         Path of a cache file never to evict, such
+                                as the checkpoint just saved.
+    """
+    now = time.time()
+    total = 0
+    files = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+
+        if name.endswith('.tmp'):
+            if now - stat.st_mtime > HIT_CACHE_TMP_MAX_AGE:
+                _remove(path)
+            else:
+                total += stat.st_size
+        elif name.endswith('.json'):
+            total += stat.st_size
+            if path != keep:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+    for mtime, size, path in sorted(files):
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def cached_interesting_hashes(door_id, processes=1, cache_dir=HIT_CACHE_DIR,
+                              engine='hashlib', stats=None):
+    """
+    Generate every interesting hash for a Door ID, in index order,
+        starting with those already in the cache and resuming the scan
+        where it last stopped. Progress is saved every so often, and
+        when the generator is closed.
+
+    Args:
+        door_id (str):      The Door ID to hash.
+        processes (int):    Number of worker processes to hash with.
+                                None uses one per CPU, 1 hashes in
+                                process.
+        cache_dir (str):    Directory to keep the cache files in.
+        engine (str):       Name of the hashing engine in ENGINES.
+        stats (MiningStats):    Stats to record the scan in, if any.
+                                    Cached hits aren't counted.
+
+    Yields:
+        tuple - (index, hashed_id)
+    """
+    hits, scanned = load_hit_cache(cache_dir, door_id)
+    for hit in list(hits):
+        yield hit
+
+    batches = interesting_batches(door_id, processes, scanned, engine,
+                                  stats)
+    saved = time.time()
+    try:
+        for scanned, batch_hits in batches:
+            hits.extend(batch_hits)
+            if time.time() - saved > HIT_CACHE_SAVE_INTERVAL:
+                save_hit_cache(cache_dir, door_id, hits, scanned)
+                saved = time.time()
+            for hit in batch_hits:
+                yield hit
+    finally:
+        batches.close()
+        save_hit_cache(cache_dir, door_id, hits, scanned)
+
+
+def _interesting_hashes(door_id, processes, cache_dir, engine, stats):
+    if cache_dir is None:
+        return interesting_hashes(door_id, processes, engine=engine,
+                                  stats=stats)
+    return cached_interesting_hashes(door_id, processes, cache_dir, engine,
+                                     stats)
+
+
+def passcode_from_hashes(hashes):
+    """
+    Build a passcode using the rules for Part 1.
+
+    Args:
+        hashes (iterable):  Interesting hashes, as (index, hashed_id)
+                                in index order.
 
     Returns:
         str
     """
     passcode = []
-    i = -1
-    while len(passcode) < PASSCODE_LENGTH:
-        i += 1
-        hashed_id = get_md5sum(door_id, i)
-        if hashed_id.startswith(INTERESTING_HASH):
-            passcode.append(hashed_id[5])
-            continue
+    for _, hashed_id in hashes:
+        passcode.append(hashed_id[5])
+        if len(passcode) == PASSCODE_LENGTH:
+            break
 
     return ''.join(passcode)
 
 
-def find_passcode_with_position(door_id):
+def positional_passcode_from_hashes(hashes):
     """
-    Find a passcode using the rules for Part 2.
+    Build a passcode using the rules for Part 2.
 
     Args:
-        door_id (str): The Door ID to hash.
+        hashes (iterable):  Interesting hashes, as (index, hashed_id)
+                                in index order.
 
     Returns:
         str
     """
     passcode = [None] * PASSCODE_LENGTH
     found = 0
-    i = -1
-    while found < PASSCODE_LENGTH:
-        i += 1
-        hashed_id = get_md5sum(door_id, i)
-        if hashed_id.startswith(INTERESTING_HASH):
-            try:
-                pos = int(hashed_id[5])
-            except:
-                continue
-            if pos >= PASSCODE_LENGTH or passcode[pos]:
-                continue
-            found += 1
-            passcode[pos] = hashed_id[6]
+    for _, hashed_id in hashes:
+        try:
+            pos = int(hashed_id[5])
+        except ValueError:
+            continue
+        if pos >= PASSCODE_LENGTH or passcode[pos]:
+            continue
+        found += 1
+        passcode[pos] = hashed_id[6]
+        if found == PASSCODE_LENGTH:
+            break
 
     return ''.join(passcode)
 
 
+def find_passcode(door_id, processes=1, cache_dir=HIT_CACHE_DIR,
+                  engine='hashlib', stats=None):
+    """
+    Find a passcode using the rules for Part 1.
+
+    Args:
+        door_id (str):      The Door ID to hash.
+        processes (int):    Number of worker processes to hash with.
+                                None uses one per CPU.
+        cache_dir (str):    Directory to cache interesting hashes in.
+                                None disables the cache.
+        engine (str):       Name of the hashing engine in ENGINES.
+        stats (MiningStats):    Stats to record the scan in, if any.
+
+    Returns:
+        str
+    """
+    hashes = _interesting_hashes(door_id, processes, cache_dir, engine,
+                                 stats)
+    try:
+        return passcode_from_hashes(hashes)
+    finally:
+        hashes.close()
+
+
+def find_passcode_with_position(door_id, processes=1,
+                                cache_dir=HIT_CACHE_DIR, engine='hashlib',
+                                stats=None):
+    """
+    Find a passcode using the rules for Part 2.
+
+    Args:
+        door_id (str):      The Door ID to hash.
+        processes (int):    Number of worker processes to hash with.
+                                None uses one per CPU.
+        cache_dir (str):    Directory to cache interesting hashes in.
+                                None disables the cache.
+        engine (str):       Name of the hashing engine in ENGINES.
+        stats (MiningStats):    Stats to record the scan in, if any.
+
+    Returns:
+        str
+    """
+    hashes = _interesting_hashes(door_id, processes, cache_dir, engine,
+                                 stats)
+    try:
+        return positional_passcode_from_hashes(hashes)
+    finally:
+        hashes.close()
+
+
+def find_passcodes(door_id, processes=1, cache_dir=HIT_CACHE_DIR,
+                   engine='hashlib', stats=None):
+    """
+    Find the passcodes for both parts from a single scan of the indexes.
+        Part 2 needs at least as many interesting hashes as Part 1, so
+        the hits it consumes are kept and Part 1 is built from those.
+
+    Args:
+        door_id (str):      The Door ID to hash.
+        processes (int):    Number of worker processes to hash with.
+                                None uses one per CPU.
+        cache_dir (str):    Directory to cache interesting hashes in.
+                                None disables the cache.
+        engine (str):       Name of the hashing engine in ENGINES.
+        stats (MiningStats):    Stats to record the scan in, if any.
+
+    Returns:
+        tuple - (Part 1 passcode, Part 2 passcode)
+    """
+    seen = []
+
+    def record(hashes):
+        for hit in hashes:
+            seen.append(hit)
+            yield hit
+
+    hashes = _interesting_hashes(door_id, processes, cache_dir, engine,
+                                 stats)
+    try:
+        passcode_two = positional_passcode_from_hashes(record(hashes))
+    finally:
+        hashes.close()
+
+    return passcode_from_hashes(seen), passcode_two
+
+
+def benchmark(door_id, count, engine='hashlib'):
+    """
+    Compare hashes per second hashing each index from scratch with
+        get_md5sum against a hashing engine.
+
+    Args:
+        door_id (str):  The Door ID to hash.
+        count (int):    Number of indexes to hash with each.
+        engine (str):   Name of the hashing engine in ENGINES.
+
+    Returns:
+        tuple - (get_md5sum, engine) hashes per second.
+    """
+    started = time.time()
+    for i in range(count):
+        get_md5sum(door_id, i).startswith(INTERESTING_HASH)
+    before = count / (time.time() - started)
+
+    started = time.time()
+    ENGINES[engine](door_id, 0, count)
+    after = count / (time.time() - started)
+
+    return before, after
+
+
 def main():
     """
     Main.
     """
-    if len(sys.argv) != 2:
-        print('Please provide the input to "decrypt"!')
-        return 1
-    door_id = sys.argv[1]
-
-    print('Passcode One: {0}'.format(find_passcode(door_id)))
-    print('Passcode Two: {0}'.format(
-        find_passcode_with_position(door_id)
-    ))
+    parser = argparse.ArgumentParser(
+        description='"Decrypt" the passcodes for a Door ID.'
+    )
+    parser.add_argument('door_id', help='The Door ID to hash.')
+    parser.add_argument('-p', '--processes', type=int, default=1,
+                        help='Number of worker processes to hash with. '
+                             '0 uses one per CPU.')
+    parser.add_argument('--no-cache', dest='cache_dir', action='store_const',
+                        const=None, default=HIT_CACHE_DIR,
+                        help="Don't read or write the interesting hash "
+                             'cache.')
+    parser.add_argument('-e', '--engine', choices=sorted(ENGINES),
+                        default='hashlib',
+                        help='How to hash candidate indexes.')
+    parser.add_argument('--stats', action='store_true',
+                        help='Report search progress to stderr, then a '
+                             'JSON summary when done.')
+    parser.add_argument('--benchmark', type=int, metavar='COUNT',
+                        help='Report hashes per second over COUNT indexes '
+                             'instead of finding the passcodes.')
+    args = parser.parse_args()
+    processes = args.processes or None
+
+    if args.benchmark:
+        before, after = benchmark(args.door_id, args.benchmark, args.engine)
+        print('get_md5sum: {0:,.0f} hashes/sec'.format(before))
+        print('{0}: {1:,.0f} hashes/sec'.format(args.engine, after))
+        return
+
+    stats = MiningStats() if args.stats else None
+    passcode_one, passcode_two = find_passcodes(args.door_id, processes,
+                                                args.cache_dir, args.engine,
+                                                stats)
+    print('Passcode One: {0}'.format(passcode_one))
+    print('Passcode Two: {0}'.format(passcode_two))
+
+    if stats is not None:
+        print(json.dumps(stats.summary()), file=sys.stderr)
 
 
 if __name__ == '__main__':
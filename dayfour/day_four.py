@@ -30,14 +30,49 @@ What is the sector ID of the room where North Pole objects are stored?
 """
 from __future__ import print_function
 
+import hashlib
+import heapq
+import mmap
 import re
+import struct
 import sys
 import string
-from collections import Counter
+import zlib
 
 
 DEFAULT_INPUT = 'input.txt'
 NORTH_POLE_NAME = 'northpole object storage'
+ROOM_RE = re.compile(r'([a-z-]+)-(\d+)\[([a-z]+)\]')
+
+try:
+    maketrans = str.maketrans
+except AttributeError:
+    maketrans = string.maketrans
+
+
+def _shift_tables():
+    """
+    Build a translation table for every possible shift, each one
+        decoding a room name shifted by that much.
+
+    Returns:
+        list - Tables, indexed by shift.
+    """
+    alpha = string.ascii_lowercase
+    return [maketrans(alpha + '-', alpha[shift:] + alpha[:shift] + ' ')
+            for shift in range(len(alpha))]
+
+
+SHIFT_TABLES = _shift_tables()
+
+# Room index layout: a header, fixed width records of valid rooms sorted
+# by sector ID, then an open addressing hash table of decoded names. Each
+# table slot holds a record number plus one, with zero marking it empty.
+# The header also holds the SHA-1 of the room list the index was built
+# from, so an index is never reused for a different list.
+INDEX_MAGIC = b'AOCROOM2'
+INDEX_HEADER = struct.Struct('<8sIIIQ20s')
+INDEX_SLOT = struct.Struct('<I')
 
 
 def read_input(fpath):
@@ -51,8 +86,29 @@ def read_input(fpath):
     Returns:
         list
     """
+    return list(iter_input(fpath))
+
+
+def iter_input(fpath):
+    """
+    Lazily read a specified input file, parsing one line at a time.
+
+    Args:
+        fpath (str):    Path of file to read.
+
+    Yields:
+        tuple - (room_name, sector_id, checksum)
+    """
+    match = ROOM_RE.match
     with open(fpath, 'r') as f:
-        return [format_sector_id(line.strip()) for line in f.readlines()]
+        for line in f:
+            m = match(line)
+            if m is None:
+                if line.strip():
+                    raise ValueError('Malformed room: {}'.format(line))
+                continue
+            room_name, sector_id, checksum = m.groups()
+            yield room_name, int(sector_id), checksum
 
 
 def format_sector_id(encrypted_room):
@@ -65,13 +121,12 @@ def format_sector_id(encrypted_room):
     Returns:
         tuple.
     """
-    checksum = re.search(r'\[[a-z]+\]', encrypted_room).group(0)
-    room_name = filter(lambda s: s.isalpha() or s == '-',
-                       encrypted_room.replace(checksum, '')).rstrip('-')
-    sector_id = int(filter(lambda d: d.isdigit(), encrypted_room))
-    checksum = re.sub(r'(\[|\])', '', checksum)
+    m = ROOM_RE.match(encrypted_room)
+    if m is None:
+        raise ValueError('Malformed room: {}'.format(encrypted_room))
+    room_name, sector_id, checksum = m.groups()
 
-    return room_name, sector_id, checksum
+    return room_name, int(sector_id), checksum
 
 
 def generate_checksum(room_name):
@@ -85,18 +140,20 @@ def generate_checksum(room_name):
     Returns:
         str
     """
-    counter = Counter(room_name)
-
-    checksum = ''.join(k for (k, v) in sorted(counter.most_common(),
-                                              key=lambda (x, y): (-y, x))[:5])
-    checksum = ''.join(sorted(checksum))
+    # Count into a fixed slot per letter, then pick the top five by
+    # (-count, letter) so ties break alphabetically.
+    counts = [room_name.count(c) for c in string.ascii_lowercase]
+    top = heapq.nsmallest(5, [(-n, c)
+                              for c, n in zip(string.ascii_lowercase, counts)
+                              if n])
+    checksum = ''.join(sorted(c for (n, c) in top))
 
     return checksum
 
 
 def get_valid_rooms(encrypted_rooms):
     """
-    Determine if a room is valid, then sum it's id.
+    Determine which rooms in a list are valid.
 
     Args:
         encrypted_rooms (list):   The list of IDs to check.
@@ -105,12 +162,11 @@ def get_valid_rooms(encrypted_rooms):
         list
     """
     valid_rooms = []
+    append = valid_rooms.append
     for encrypted_room in encrypted_rooms:
         room_name, sector_id, checksum = encrypted_room
-        room_name = room_name.replace('-', '')
-        checksum = ''.join(sorted(checksum))
-        if checksum == generate_checksum(room_name):
-            valid_rooms.append(encrypted_room)
+        if ''.join(sorted(checksum)) == generate_checksum(room_name):
+            append(encrypted_room)
 
     return valid_rooms
 
@@ -127,35 +183,46 @@ def decode_room_name(room_name, sector_id):
     Returns:
         str
     """
-    decoded_name = []
-    alpha = string.ascii_lowercase
-    for c in room_name:
-        if c == '-':
-            decoded_name.append(' ')
-            continue
+    return room_name.translate(SHIFT_TABLES[sector_id % len(SHIFT_TABLES)])
+
+
+def encode_room_name(name):
+    """
+    Encode a decoded room name with every possible shift.
 
-        i = alpha.index(c)
-        decoded_name.append(alpha[(i + sector_id) % len(alpha)])
+    Args:
+        name (str):     The decoded room name.
 
-    return ''.join(decoded_name)
+    Returns:
+        dict - Maps each encoded name to the shift that decodes it.
+    """
+    alpha = string.ascii_lowercase
+    encoded = {}
+    for shift in range(len(alpha)):
+        table = maketrans(alpha[shift:] + alpha[:shift] + ' ', alpha + '-')
+        encoded[name.translate(table)] = shift
+    return encoded
 
 
-def find_north_pole(valid_rooms):
+def find_north_pole(valid_rooms, name=NORTH_POLE_NAME):
     """
-    Decode the room names and find the north pole.
+    Find the north pole. Rather than decoding every room name, the
+        name we're after is encoded once per shift and the rooms are
+        matched against those directly.
 
     Args:
-        valid_rooms (list):     A list of valid rooms to decode/search.
+        valid_rooms (list):     A list of valid rooms to search.
+        name (str):             The decoded name to look for.
 
     Returns:
         tuple
     """
-    global NORTH_POLE_NAME
+    encoded_names = encode_room_name(name)
     for room in valid_rooms:
         room_name, sector_id, checksum = room
-        decoded_name = decode_room_name(room_name, sector_id)
-        if decoded_name == NORTH_POLE_NAME:
-            return decoded_name, sector_id
+        shift = encoded_names.get(room_name)
+        if shift is not None and shift == sector_id % len(SHIFT_TABLES):
+            return name, sector_id
 
 
 def sum_valid_rooms(valid_rooms):
@@ -173,18 +240,219 @@ def sum_valid_rooms(valid_rooms):
     return sum([i[1] for i in valid_rooms])
 
 
+def _name_hash(name):
+    return zlib.crc32(name) & 0xffffffff
+
+
+def file_digest(fpath):
+    """
+    Hash a file's contents, a chunk at a time.
+
+    Args:
+        fpath (str):    Path of the file to hash.
+
+    Returns:
+        bytes - The SHA-1 digest.
+    """
+    sha1 = hashlib.sha1()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            sha1.update(chunk)
+    return sha1.digest()
+
+
+def build_index(encrypted_rooms, fpath, source_digest=b''):
+    """
+    Validate and decode a list of rooms, then write the valid ones to
+        a room index file for RoomIndex to query.
+
+    Args:
+        encrypted_rooms (list):     The rooms to index.
+        fpath (str):                Path of the index file to write.
+        source_digest (bytes):      SHA-1 of the room list, as from
+                                        file_digest, to record in the
+                                        index.
+    """
+    rooms = sorted((sector_id, decode_room_name(room_name, sector_id)
+                    .encode('ascii'))
+                   for room_name, sector_id, checksum
+                   in get_valid_rooms(encrypted_rooms))
+
+    width = max([len(name) for sector_id, name in rooms] or [0])
+    record = struct.Struct('<I{}s'.format(width))
+
+    slots = 1
+    while slots < 2 * len(rooms):
+        slots *= 2
+    table = [0] * slots
+    for i, (sector_id, name) in enumerate(rooms):
+        slot = _name_hash(name) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = i + 1
+
+    with open(fpath, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(rooms), width, slots,
+                                  sum(sector_id for sector_id, _ in rooms),
+                                  source_digest))
+        for sector_id, name in rooms:
+            f.write(record.pack(sector_id, name))
+        for entry in table:
+            f.write(INDEX_SLOT.pack(entry))
+
+
+class RoomIndex(object):
+    """
+    Read only view of a room index file written by build_index. The
+        file is memory-mapped, so queries only touch the records they
+        need.
+    """
+
+    def __init__(self, fpath):
+        """
+        Constructor.
+
+        Args:
+            fpath (str):    Path of the index file to open.
+        """
+        with open(fpath, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            header = INDEX_HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            header = (None,) * 6
+        (magic, self.rooms, width, self.slots, self.valid_sum,
+         self.source_digest) = header
+        if magic != INDEX_MAGIC:
+            self.close()
+            raise ValueError('Not a room index: {}'.format(fpath))
+
+        self._record = struct.Struct('<I{}s'.format(width))
+        self._table_offset = INDEX_HEADER.size + self.rooms * self._record.size
+
+    def __len__(self):
+        return self.rooms
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def room(self, i):
+        """
+        Read a room from the index.
+
+        Args:
+            i (int):    Record number of the room.
+
+        Returns:
+            tuple - (decoded_name, sector_id)
+        """
+        sector_id, name = self._record.unpack_from(
+            self._map, INDEX_HEADER.size + i * self._record.size
+        )
+        name = name.rstrip(b'\0')
+        # Python 2 reads back a native str already.
+        if bytes is not str:
+            name = name.decode('ascii')
+        return name, sector_id
+
+    def sum_valid_rooms(self):
+        """
+        Get the sum of all the sector IDs in valid rooms.
+
+        Returns:
+            int
+        """
+        return self.valid_sum
+
+    def find_room(self, name=NORTH_POLE_NAME):
+        """
+        Look up a valid room by its decoded name.
+
+        Args:
+            name (str):     The decoded name to look for.
+
+        Returns:
+            tuple - (decoded_name, sector_id), or None if there's no
+                such room.
+        """
+        key = name.encode('ascii')
+        slot = _name_hash(key) & (self.slots - 1)
+        while True:
+            entry, = INDEX_SLOT.unpack_from(
+                self._map, self._table_offset + slot * INDEX_SLOT.size
+            )
+            if not entry:
+                return None
+            room = self.room(entry - 1)
+            if room[0] == name:
+                return room
+            slot = (slot + 1) & (self.slots - 1)
+
+    def find_sector(self, sector_id):
+        """
+        Look up the valid rooms in a sector.
+
+        Args:
+            sector_id (int):    The sector ID to look for.
+
+        Returns:
+            list - Tuples of (decoded_name, sector_id).
+        """
+        # Records are sorted by sector ID, so bisect to the first one.
+        low, high = 0, self.rooms
+        while low < high:
+            mid = (low + high) // 2
+            if self.room(mid)[1] < sector_id:
+                low = mid + 1
+            else:
+                high = mid
+
+        found = []
+        while low < self.rooms:
+            room = self.room(low)
+            if room[1] != sector_id:
+                break
+            found.append(room)
+            low += 1
+        return found
+
+
 def main():
     """
     Main.
     """
-    global INPUT
+    global DEFAULT_INPUT
     try:
         input_file = sys.argv[1]
     except IndexError:
-        input_file = INPUT
-
-    encrypted_rooms = read_input(input_file)
-    valid_rooms = get_valid_rooms(encrypted_rooms)
+        input_file = DEFAULT_INPUT
+
+    # With an index file, (re)build it unless it was built from this
+    # exact room list, then answer from it.
+    if len(sys.argv) > 2:
+        index_file = sys.argv[2]
+        source_digest = file_digest(input_file)
+        try:
+            with RoomIndex(index_file) as index:
+                stale = index.source_digest != source_digest
+        except (IOError, OSError, ValueError):
+            stale = True
+        if stale:
+            build_index(iter_input(input_file), index_file, source_digest)
+
+        with RoomIndex(index_file) as index:
+            print('Part One: {}'.format(index.sum_valid_rooms()))
+            print('Part Two: {}'.format(index.find_room(NORTH_POLE_NAME)))
+        return
+
+    valid_rooms = get_valid_rooms(iter_input(input_file))
 
     print('Part One: {}'.format(sum_valid_rooms(valid_rooms)))
 
@@ -38,8 +38,237 @@ For example:
 """
 from __future__ import print_function
 
+import bisect
 import os
 import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_SIZE = 64 * 1024
+
+try:
+    array('q')
+    INT64_TYPECODE = 'q'
+except ValueError:
+    # Python 2 has no 'q', but its 'l' is 64 bits on 64 bit Unix.
+    INT64_TYPECODE = 'l'
+
+
+class _ActiveSet(object):
+    """
+    Sorted keys, all known up front, which are switched on one at a
+        time. A Fenwick tree of counts finds the nearest switched on key
+        to a value in O(log n).
+    """
+
+    def __init__(self, keys):
+        """
+        Constructor.
+
+        Args:
+            keys (list):    The keys, sorted.
+        """
+        self.keys = keys
+        self.active = 0
+        self._tree = [0] * (len(keys) + 1)
+        self._top = 1
+        while self._top * 2 <= len(keys):
+            self._top *= 2
+
+    def activate(self, i):
+        """
+        Switch on the key at index i.
+        """
+        self.active += 1
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += 1
+            i += i & -i
+
+    def _count(self, i):
+        # Number of switched on keys in keys[:i].
+        count = 0
+        while i:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def _nth(self, n):
+        # Index of the nth (from 1) switched on key.
+        i = 0
+        step = self._top
+        while step:
+            if i + step < len(self._tree) and self._tree[i + step] < n:
+                i += step
+                n -= self._tree[i]
+            step //= 2
+        return i
+
+    def first_at_least(self, key):
+        """
+        Index of the smallest switched on key >= key, or None.
+        """
+        count = self._count(bisect.bisect_left(self.keys, key))
+        if count == self.active:
+            return None
+        return self._nth(count + 1)
+
+    def last_at_most(self, key):
+        """
+        Index of the largest switched on key <= key, or None.
+        """
+        count = self._count(bisect.bisect_right(self.keys, key))
+        if not count:
+            return None
+        return self._nth(count)
+
+
+class _LineIndex(object):
+    """
+    Walked pieces running one way, grouped by the line they lie on.
+        Pieces on a line don't overlap until the walk revisits somewhere,
+        so each line's pieces are ordered by where they begin.
+    """
+
+    def __init__(self, pieces):
+        """
+        Constructor.
+
+        Args:
+            pieces (list):  Every piece that may be added, as
+                                (piece_id, (fixed, low, high)).
+        """
+        lines = {}
+        for piece_id, (fixed, low, high) in pieces:
+            lines.setdefault(fixed, []).append((low, high, piece_id))
+
+        self._lines = {}
+        self._slots = {}
+        for fixed, line in lines.items():
+            line.sort()
+            self._lines[fixed] = (_ActiveSet([low for low, _, _ in line]),
+                                  [high for _, high, _ in line])
+            for i, (_, _, piece_id) in enumerate(line):
+                self._slots[piece_id] = (fixed, i)
+
+    def add(self, piece_id):
+        fixed, i = self._slots[piece_id]
+        self._lines[fixed][0].activate(i)
+
+    def first_hit(self, fixed, low, high, sign):
+        """
+        Find the first point of [low, high] on a line, walking it in the
+            direction of sign, which lies on an added piece.
+
+        Returns:
+            int - Where along the line, or None.
+        """
+        if fixed not in self._lines:
+            return None
+        starts, ends = self._lines[fixed]
+
+        if sign > 0:
+            i = starts.last_at_most(low)
+            if i is not None and ends[i] >= low:
+                return low
+            i = starts.first_at_least(low)
+            if i is not None and starts.keys[i] <= high:
+                return starts.keys[i]
+        else:
+            i = starts.last_at_most(high)
+            if i is not None and ends[i] >= low:
+                return min(ends[i], high)
+        return None
+
+
+class _CrossingIndex(object):
+    """
+    Walked pieces running one way, found by where they cross lines
+        running the other. A segment tree over the coordinates those
+        lines can be at keeps, in each node, the pieces spanning that
+        node's coordinates ordered by the line each lies on.
+    """
+
+    def __init__(self, pieces, coords):
+        """
+        Constructor.
+
+        Args:
+            pieces (list):  Every piece that may be added, as
+                                (piece_id, (fixed, low, high)).
+            coords (list):  Sorted coordinates crossings will be looked
+                                up at.
+        """
+        self._coords = coords
+        nodes = {}
+        for piece_id, (fixed, low, high) in pieces:
+            for node in self._span(low, high):
+                nodes.setdefault(node, []).append((fixed, piece_id))
+
+        self._nodes = {}
+        self._slots = {}
+        for node, entries in nodes.items():
+            entries.sort()
+            self._nodes[node] = _ActiveSet([fixed for fixed, _ in entries])
+            for i, (_, piece_id) in enumerate(entries):
+                self._slots.setdefault(piece_id, []).append((node, i))
+
+    def _span(self, low, high):
+        # Segment tree nodes exactly covering the coordinates in
+        # [low, high].
+        size = len(self._coords)
+        left = bisect.bisect_left(self._coords, low) + size
+        right = bisect.bisect_right(self._coords, high) + size
+        while left < right:
+            if left & 1:
+                yield left
+                left += 1
+            if right & 1:
+                right -= 1
+                yield right
+            left //= 2
+            right //= 2
+
+    def add(self, piece_id):
+        for node, i in self._slots.get(piece_id, ()):
+            self._nodes[node].activate(i)
+
+    def first_hit(self, at, low, high, sign):
+        """
+        Find the first added piece crossing the line through at, between
+            low and high, walking it in the direction of sign.
+
+        Returns:
+            int - Where along the line, or None.
+        """
+        i = bisect.bisect_left(self._coords, at)
+        if i == len(self._coords) or self._coords[i] != at:
+            return None
+
+        best = None
+        node = i + len(self._coords)
+        while node:
+            active = self._nodes.get(node)
+            node //= 2
+            if active is None:
+                continue
+
+            if sign > 0:
+                j = active.first_at_least(low)
+                if j is None or active.keys[j] > high:
+                    continue
+            else:
+                j = active.last_at_most(high)
+                if j is None or active.keys[j] < low:
+                    continue
+            hit = active.keys[j]
+            if best is None or (hit - best) * sign < 0:
+                best = hit
+        return best
 
 
 class FindEasterBunny(object):
@@ -53,7 +282,6 @@ class FindEasterBunny(object):
                                     use the shortcut.
         """
         self.direction = 0  # 0123 = NESW
-        self.history = set()
         self.x = 0
         self.y = 0
         self.shortcut = shortcut
@@ -102,16 +330,110 @@ class FindEasterBunny(object):
         elif self.direction == 3:
             self.x -= steps
 
+    def _leg(self, steps):
+        """
+        Describe the leg we're about to walk in terms of the axis it
+            runs along.
+
+        Args:
+            steps (int):    The number of steps to walk.
+
+        Returns:
+            Tuple - (axis, fixed, start, end). Axis is 0 for a horizontal
+                leg and 1 for a vertical one, fixed is the coordinate that
+                doesn't change, start/end the one that does.
+        """
+        sign = 1 if self.direction in (0, 1) else -1
+        if self.direction % 2:
+            return 0, self.y, self.x, self.x + sign * steps
+        return 1, self.x, self.y, self.y + sign * steps
+
+    def _find_revisit(self, instructions):
+        """
+        Walk the instructions and stop at the first location visited
+            twice.
+
+        The walk is split into pieces that each leave out the spot they
+            start from, with the starting point as a piece of its own.
+            Until somewhere is revisited no two pieces overlap, so the
+            first piece to overlap an earlier one holds the answer.
+
+        This reads every instruction before searching, even when the
+            revisit comes within the first few legs. Afterwards the
+            walker is left at the revisited location facing the way it
+            was walking, or at the end of the route if nowhere is
+            visited twice.
+
+        Args:
+            instructions (iterable):    The instructions to walk.
+
+        Returns:
+            int - Number of blocks from the start to the first location
+                visited twice, or None if nowhere is visited twice.
+        """
+        # (axis, fixed, low, high, sign, direction), sign being the way
+        # it's walked and direction the heading it's walked with.
+        pieces = [(1, self.x, self.y, self.y, 1, self.direction)]
+        for instruction in instructions:
+            self._turn(instruction[0])
+            steps = int(instruction[1:])
+            if not steps:
+                continue
+            axis, fixed, start, end = self._leg(steps)
+            sign = 1 if end > start else -1
+            pieces.append((axis, fixed, min(start + sign, end),
+                           max(start + sign, end), sign, self.direction))
+            self._move(steps)
+
+        by_axis = ([], [])
+        for piece_id, (axis, fixed, low, high, _, _) in enumerate(pieces):
+            by_axis[axis].append((piece_id, (fixed, low, high)))
+        lines = (_LineIndex(by_axis[0]), _LineIndex(by_axis[1]))
+        # Horizontal pieces are crossed by vertical ones at the vertical
+        # piece's x, and the other way around.
+        crossings = (
+            _CrossingIndex(by_axis[0], sorted(set(f for _, (f, _, _)
+                                                  in by_axis[1]))),
+            _CrossingIndex(by_axis[1], sorted(set(f for _, (f, _, _)
+                                                  in by_axis[0]))),
+        )
+
+        for piece_id, (axis, fixed, low, high, sign,
+                       direction) in enumerate(pieces):
+            hits = [lines[axis].first_hit(fixed, low, high, sign),
+                    crossings[1 - axis].first_hit(fixed, low, high, sign)]
+            hits = [hit for hit in hits if hit is not None]
+            if hits:
+                hit = min(hits) if sign > 0 else max(hits)
+                if axis == 0:
+                    self.x, self.y = hit, fixed
+                else:
+                    self.x, self.y = fixed, hit
+                self.direction = direction
+                return self.distance
+
+            lines[axis].add(piece_id)
+            crossings[axis].add(piece_id)
+
+        return None
+
     def find_route(self, instructions):
         """
         Count the number of blocks traveled using a list of instructions.
+            When using the shortcut, stop at the first location visited
+            twice instead. The shortcut still reads all of the
+            instructions, see _find_revisit.
 
         Args:
             instructions (str):     String containing a comma separated
                                         list of instructions.
         Returns:
-            int - Number of blocks traveled.
+            int - Number of blocks traveled, or None if taking the
+                shortcut and no location is visited twice.
         """
+        if self.shortcut:
+            return self._find_revisit(instructions)
+
         for instruction in instructions:
             direction = instruction[0]
             steps = int(instruction[1:])
@@ -122,23 +444,229 @@ class FindEasterBunny(object):
         return self.distance
 
 
+class IndexedRoute(object):
+    """
+    A route which remembers where the walker was after every instruction,
+        so positions and distances can be looked up without replaying
+        the route from the start.
+    """
+
+    def __init__(self, instructions=()):
+        """
+        Constructor.
+
+        Args:
+            instructions (iterable):    Instructions to index, as accepted
+                                            by FindEasterBunny.find_route.
+        """
+        self.direction = 0  # 0123 = NESW
+        # Prefix positions and max distances, entry k is the state after
+        # k instructions, so entry 0 is the starting point.
+        self._x = array(INT64_TYPECODE, [0])
+        self._y = array(INT64_TYPECODE, [0])
+        self._max_distance = array(INT64_TYPECODE, [0])
+        self.extend(instructions)
+
+    def __len__(self):
+        return len(self._x) - 1
+
+    def append(self, instruction):
+        """
+        Walk one more instruction and index the result.
+
+        Args:
+            instruction (str):  A single instruction, e.g. 'R123'.
+        """
+        turn = 1 if instruction[0] == 'R' else -1
+        steps = int(instruction[1:])
+        self.direction = (self.direction + turn) % 4
+
+        x, y = self._x[-1], self._y[-1]
+        if self.direction == 0:
+            y += steps
+        elif self.direction == 1:
+            x += steps
+        elif self.direction == 2:
+            y -= steps
+        elif self.direction == 3:
+            x -= steps
+
+        self._x.append(x)
+        self._y.append(y)
+        self._max_distance.append(
+            max(self._max_distance[-1], abs(x) + abs(y))
+        )
+
+    def extend(self, instructions):
+        """
+        Walk and index several instructions.
+
+        Args:
+            instructions (iterable):    The instructions to add.
+        """
+        for instruction in instructions:
+            self.append(instruction)
+
+    def _check_step(self, k):
+        if not 0 <= k <= len(self):
+            raise IndexError(
+                'step {} is outside of route of length {}'.format(k, len(self))
+            )
+
+    def position(self, k):
+        """
+        Where the walker is after k instructions.
+
+        Args:
+            k (int):    Number of instructions walked.
+
+        Returns:
+            Tuple - (X, Y)
+        """
+        self._check_step(k)
+        return self._x[k], self._y[k]
+
+    def distance(self, k):
+        """
+        How far from the start the walker is after k instructions.
+
+        Args:
+            k (int):    Number of instructions walked.
+
+        Returns:
+            int
+        """
+        x, y = self.position(k)
+        return abs(x) + abs(y)
+
+    def max_distance(self, k):
+        """
+        The furthest the walker got from the start within the first
+            k instructions, measured at the end of each instruction.
+
+        Args:
+            k (int):    Number of instructions walked.
+
+        Returns:
+            int
+        """
+        self._check_step(k)
+        return self._max_distance[k]
+
+
+def find_routes(routes):
+    """
+    Evaluate a whole batch of routes at once using array operations.
+        Turns become +1/-1, each heading is the running sum of turns
+        (mod 4) within its route, and every route's final position is
+        the sum of its displacements.
+
+    Args:
+        routes (list):  List of routes, each a list of instructions
+                            as accepted by FindEasterBunny.find_route.
+
+    Returns:
+        list - Number of blocks traveled for each route.
+    """
+    if np is None:
+        raise ImportError('numpy is required to evaluate routes in batch')
+
+    lengths = np.array([len(route) for route in routes], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    route_ids = np.repeat(np.arange(len(routes)), lengths)
+
+    instructions = [i for route in routes for i in route]
+    turns = np.array([1 if i[0] == 'R' else -1 for i in instructions],
+                     dtype=np.int64)
+    steps = np.array([int(i[1:]) for i in instructions], dtype=np.int64)
+
+    # Running turn total, restarted at the beginning of each route.
+    turn_totals = np.concatenate(([0], np.cumsum(turns)))
+    headings = (turn_totals[1:] - turn_totals[offsets[:-1]][route_ids]) % 4
+
+    # 0123 = NESW
+    delta_x = np.array([0, 1, 0, -1], dtype=np.int64)[headings] * steps
+    delta_y = np.array([1, 0, -1, 0], dtype=np.int64)[headings] * steps
+
+    x_totals = np.concatenate(([0], np.cumsum(delta_x)))
+    y_totals = np.concatenate(([0], np.cumsum(delta_y)))
+    x = x_totals[offsets[1:]] - x_totals[offsets[:-1]]
+    y = y_totals[offsets[1:]] - y_totals[offsets[:-1]]
+
+    return (np.abs(x) + np.abs(y)).tolist()
+
+
+def read_instructions(f, chunk_size=CHUNK_SIZE):
+    """
+    Lazily tokenize a comma separated list of instructions from a file,
+        reading it in fixed size chunks so the route never has to fit
+        in memory.
+
+    Args:
+        f (file):           File-like object to read from.
+        chunk_size (int):   Number of characters to read at a time.
+
+    Yields:
+        str - A single instruction, e.g. 'R123'.
+    """
+    leftover = ''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+
+        # The last token may continue in the next chunk, so hold on to it.
+        tokens = (leftover + chunk).split(',')
+        leftover = tokens.pop()
+        for token in tokens:
+            token = token.strip()
+            if token:
+                yield token
+
+    leftover = leftover.strip()
+    if leftover:
+        yield leftover
+
+
+def load_instructions(user_arg):
+    """
+    Generate instructions from either a file path or the instructions
+        themselves.
+
+    Args:
+        user_arg (str):     Path to an input file, or a comma separated
+                                list of instructions.
+
+    Yields:
+        str - A single instruction.
+    """
+    if os.path.isfile(user_arg):
+        with open(user_arg, 'r') as f:
+            for instruction in read_instructions(f):
+                yield instruction
+    else:
+        for instruction in user_arg.split(','):
+            instruction = instruction.strip()
+            if instruction:
+                yield instruction
+
+
 def main():
     """
     Main.
     """
     if len(sys.argv) < 2:
         print('Please provide an input')
+        return 1
 
     user_arg = sys.argv[1]
-    if os.path.isfile(user_arg):
-        with open(user_arg, 'r') as f:
-            data = f.read()
-    else:
-        data = user_arg
 
-    data = [i.strip() for i in data.split(',')]
     part_one = FindEasterBunny()
-    print(part_one.find_route(data))
+    print(part_one.find_route(load_instructions(user_arg)))
+
+    # Both parts read the whole route, so the input is streamed twice.
+    part_two = FindEasterBunny(shortcut=True)
+    print(part_two.find_route(load_instructions(user_arg)))
 
 
 if __name__ == '__main__':
@@ -40,6 +40,8 @@ from itertools import chain
 DEFAULT_INPUT = 'input.txt'
 HYPERNET_RE = re.compile(r'\[(\w+)\]')
 SUPERNET_RE = re.compile(r'\[\w+\]')
+ABBA_RE = re.compile(r'(?=(\w)(\w)\2\1)')
+ABA_RE = re.compile(r'(?=(\w)(?!\1)(\w)\1)')
 
 
 def read_input(fpath):
@@ -67,19 +69,17 @@ def valid_ip(ip):
     Returns:
         bool
     """
-    abba_re = re.compile(r'(?=(\w)(\w)\2\1)')
-
     def valid_match(a, b):
         return a != b
 
     hypernets = HYPERNET_RE.findall(ip)
     hypernet_abbas = chain.from_iterable(
-        abba_re.findall(h) for h in hypernets
+        ABBA_RE.findall(h) for h in hypernets
     )
 
     supernets = SUPERNET_RE.split(ip)
     supernet_abbas = chain.from_iterable(
-        abba_re.findall(s) for s in supernets
+        ABBA_RE.findall(s) for s in supernets
     )
 
     return (
@@ -88,6 +88,45 @@ def valid_ip(ip):
     )
 
 
+def scan_ip(ip):
+    """
+    Check whether an IP supports both TLS and SSL in a single pass,
+        sliding a window over each bracketed or unbracketed section.
+
+    Args:
+        ip (str):   The IP to test.
+
+    Returns:
+        tuple - (supports TLS, supports SSL)
+    """
+    depth = 0
+    supernet_abba = hypernet_abba = False
+    supernet_abas = set()
+    hypernet_babs = set()
+    # The last three characters seen in the current section.
+    a = b = c = None
+    for d in ip:
+        if d == '[' or d == ']':
+            depth = depth + 1 if d == '[' else max(depth - 1, 0)
+            a = b = c = None
+            continue
+
+        if c is not None and b is not None and d == b and b != c:
+            if depth:
+                hypernet_babs.add((c, b))
+            else:
+                supernet_abas.add((b, c))
+        if a is not None and a == d and b == c and a != b:
+            if depth:
+                hypernet_abba = True
+            else:
+                supernet_abba = True
+        a, b, c = b, c, d
+
+    return (supernet_abba and not hypernet_abba,
+            not supernet_abas.isdisjoint(hypernet_babs))
+
+
 def count_valid_ips(ips):
     """
     Count the number of valid IP addresses.
@@ -100,7 +139,7 @@ def count_valid_ips(ips):
     """
     count = 0
     for ip in ips:
-        count += 1 if valid_ip(ip) else 0
+        count += 1 if scan_ip(ip)[0] else 0
 
     return count
 
@@ -117,19 +156,17 @@ def supports_ssl(ip):
     Returns:
         bool
     """
-    aba_re = re.compile(r'(?=(\w)(\w)(\1))')
-
-    def bab(a, b, _):
-        return (b, a, b)
+    def bab(a, b):
+        return (b, a)
 
     supernets = SUPERNET_RE.split(ip)
     supernet_abas = list(chain.from_iterable(
-        aba_re.findall(s) for s in supernets)
+        ABA_RE.findall(s) for s in supernets)
     )
 
     hypernets = HYPERNET_RE.findall(ip)
     hypernet_abas = list(chain.from_iterable(
-        aba_re.findall(h) for h in hypernets)
+        ABA_RE.findall(h) for h in hypernets)
     )
 
     return any(bab(*s) in hypernet_abas for s in supernet_abas)
@@ -147,11 +184,31 @@ def count_valid_ssl_ips(ips):
     """
     count = 0
     for ip in ips:
-        count += 1 if supports_ssl(ip) else 0
+        count += 1 if scan_ip(ip)[1] else 0
 
     return count
 
 
+def count_valid(ips):
+    """
+    Count the IP addresses supporting TLS and SSL, scanning each
+        address once for both.
+
+    Args:
+        ips (list):     List of "IP" addresses to check.
+
+    Returns:
+        tuple - (number supporting TLS, number supporting SSL)
+    """
+    tls = ssl = 0
+    for ip in ips:
+        has_tls, has_ssl = scan_ip(ip)
+        tls += 1 if has_tls else 0
+        ssl += 1 if has_ssl else 0
+
+    return tls, ssl
+
+
 def main():
     """
     Main.
@@ -164,8 +221,9 @@ def main():
 
     ips = read_input(input_file)
 
-    print('Part One: {0}'.format(count_valid_ips(ips)))
-    print('Part Two: {0}'.format(count_valid_ssl_ips(ips)))
+    tls, ssl = count_valid(ips)
+    print('Part One: {0}'.format(tls))
+    print('Part Two: {0}'.format(ssl))
 
 
 if __name__ == '__main__':
@@ -39,10 +39,19 @@ Given the recording in your puzzle input and this new decoding methodology, what
 """
 from __future__ import print_function
 
+import multiprocessing
+import os
 import sys
-from collections import Counter
+from collections import Counter, deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 DEFAULT_INPUT = 'input.txt'
+ALPHABET_SIZE = 256
+CHUNK_SIZE = 16 * 1024 * 1024
 
 
 def read_input(fpath):
@@ -62,7 +71,7 @@ def read_input(fpath):
 def decode_message_most_common(signals):
     """
     Decode the message using the most common character
-        in each column.
+        in each column. Ties go to the lowest character.
 
     Args:
         signals (list):     List of signals to "decode".
@@ -72,10 +81,10 @@ def decode_message_most_common(signals):
 
     """
     result = []
-    for i in xrange(0, len(signals[0])):
+    for i in range(0, len(signals[0])):
+        counts = Counter([s[i] for s in signals])
         result.append(
-            Counter([s[i] for s in signals])
-            .most_common()[0][0]
+            min(counts, key=lambda char: (-counts[char], char))
         )
 
     return ''.join(result)
@@ -84,7 +93,7 @@ def decode_message_most_common(signals):
 def decode_message_least_common(signals):
     """
     Decode the message using the least common character
-        in each column.
+        in each column. Ties go to the lowest character.
 
     Args:
         signals (list):     List of signals to "decode".
@@ -93,15 +102,279 @@ def decode_message_least_common(signals):
         str
     """
     result = []
-    for i in xrange(0, len(signals[0])):
+    for i in range(0, len(signals[0])):
+        counts = Counter([s[i] for s in signals])
         result.append(
-            Counter([s[i] for s in signals])
-            .most_common()[-1][0]
+            min(counts, key=lambda char: (counts[char], char))
         )
 
     return ''.join(result)
 
 
+def count_signals(signals):
+    """
+    Count how often each character appears in each column, in a single
+        pass over the signals.
+
+    Args:
+        signals (list):     List of signals, all the same length.
+
+    Returns:
+        array - Of shape (width, 256), counts indexed by column then
+            character code.
+    """
+    if np is None:
+        raise ImportError('numpy is required to count signals')
+
+    width = len(signals[0])
+    for signal in signals:
+        if len(signal) != width:
+            raise ValueError('Expected signals of length {}, got {!r}'
+                             .format(width, signal))
+
+    chars = np.frombuffer(''.join(signals).encode('ascii'),
+                          dtype=np.uint8).reshape(-1, width)
+    return _count_columns(chars)
+
+
+def _count_columns(chars):
+    width = chars.shape[1]
+    # Give every column its own run of 256 bins, so one bincount covers
+    # the whole matrix.
+    bins = chars + np.arange(width) * ALPHABET_SIZE
+    return np.bincount(bins.ravel(), minlength=width * ALPHABET_SIZE) \
+        .reshape(width, ALPHABET_SIZE)
+
+
+def _next_line(f, offset):
+    """
+    Find where the first line starting at or after an offset begins.
+    """
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def _count_block(block, width):
+    rows = [row.rstrip(b'\r') for row in block.split(b'\n')]
+    rows = [row for row in rows if row]
+    data = b''.join(rows)
+    if len(data) != len(rows) * width:
+        raise ValueError('Expected signals of length {}'.format(width))
+    return _count_columns(
+        np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+    )
+
+
+def count_shard(fpath, start, end, width, chunk_size=CHUNK_SIZE):
+    """
+    Count the columns of the signals in a byte range of a file, reading
+        it a chunk at a time. A signal belongs to the shard its first
+        byte falls in.
+
+    Args:
+        fpath (str):        Path of the signal file.
+        start (int):        Offset the shard starts at.
+        end (int):          Offset the shard ends before.
+        width (int):        Length of every signal.
+        chunk_size (int):   Number of bytes to read at a time.
+
+    Returns:
+        array - Of shape (width, 256), as count_signals.
+    """
+    counts = np.zeros((width, ALPHABET_SIZE), dtype=np.int64)
+    with open(fpath, 'rb') as f:
+        start = _next_line(f, start)
+        remaining = _next_line(f, end) - start
+        f.seek(start)
+
+        leftover = b''
+        while remaining > 0:
+            block = f.read(min(chunk_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+
+            # Hold back a partial signal until the rest of it is read.
+            block = leftover + block
+            cut = len(block) if remaining <= 0 else block.rfind(b'\n') + 1
+            block, leftover = block[:cut], block[cut:]
+            counts += _count_block(block, width)
+
+        if leftover:
+            counts += _count_block(leftover, width)
+
+    return counts
+
+
+def _count_shard(args):
+    return count_shard(*args)
+
+
+def count_signals_file(fpath, processes=None, chunk_size=CHUNK_SIZE):
+    """
+    Count how often each character appears in each column of a signal
+        file, with workers counting byte range shards of the file in
+        parallel and their counts summed. Counting is exact, so the
+        result doesn't depend on the number of workers.
+
+    Args:
+        fpath (str):        Path of the signal file.
+        processes (int):    Number of worker processes, None for one
+                                per CPU, 1 counts in process.
+        chunk_size (int):   Number of bytes each worker reads at a time.
+
+    Returns:
+        array - Of shape (width, 256), as count_signals.
+    """
+    if np is None:
+        raise ImportError('numpy is required to count signals')
+
+    with open(fpath, 'rb') as f:
+        width = len(f.readline().rstrip(b'\r\n'))
+    size = os.path.getsize(fpath)
+
+    processes = processes or multiprocessing.cpu_count()
+    bounds = [size * i // processes for i in range(processes + 1)]
+    shards = [(fpath, bounds[i], bounds[i + 1], width, chunk_size)
+              for i in range(processes)]
+
+    if processes == 1:
+        return count_shard(*shards[0])
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        return sum(pool.map(_count_shard, shards))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def decode_messages(counts):
+    """
+    Decode the message using both the most and least common character
+        in each column. Ties go to the lowest character.
+
+    Args:
+        counts (array):     Column character counts, as from
+                                count_signals.
+
+    Returns:
+        tuple - (most common message, least common message)
+
+    Ties are broken the same way as decode_message_most_common and
+        decode_message_least_common:
+
+    >>> signals = ['ab', 'ba', 'ab', 'ba', 'cc', 'cc']
+    >>> decode_messages(count_signals(signals))
+    ('aa', 'aa')
+    >>> (decode_message_most_common(signals),
+    ...  decode_message_least_common(signals))
+    ('aa', 'aa')
+    """
+    most_common = counts.argmax(axis=1)
+    # Characters that never appear can't be the least common.
+    least_common = np.where(counts > 0, counts,
+                            np.iinfo(counts.dtype).max).argmin(axis=1)
+
+    return (most_common.astype(np.uint8).tobytes().decode('ascii'),
+            least_common.astype(np.uint8).tobytes().decode('ascii'))
+
+
+class SignalDecoder(object):
+    """
+    Decode a stream of signals as they arrive, keeping running column
+        counts so the current message never needs the full history.
+    """
+
+    def __init__(self, window=None):
+        """
+        Constructor.
+
+        Args:
+            window (int):   Only decode from the most recent this many
+                                signals. None keeps every signal.
+        """
+        if np is None:
+            raise ImportError('numpy is required to decode signals')
+
+        self.window = window
+        self.counts = None
+        self._signals = deque()
+        self._columns = None
+
+    def __len__(self):
+        if self.counts is None:
+            return 0
+        return int(self.counts[0].sum())
+
+    def _update(self, signal, delta):
+        codes = np.frombuffer(signal.encode('ascii'), dtype=np.uint8)
+        if self.counts is None:
+            self.counts = np.zeros((len(codes), ALPHABET_SIZE),
+                                   dtype=np.int64)
+            self._columns = np.arange(len(codes))
+        elif len(codes) != len(self._columns):
+            raise ValueError('Expected a signal of length {}, got {!r}'
+                             .format(len(self._columns), signal))
+        self.counts[self._columns, codes] += delta
+
+    def add(self, signal):
+        """
+        Add a signal, evicting the oldest if the window is full.
+
+        Args:
+            signal (str):   The signal to add.
+        """
+        self._update(signal, 1)
+        if self.window is not None:
+            self._signals.append(signal)
+            if len(self._signals) > self.window:
+                self._update(self._signals.popleft(), -1)
+
+    def add_many(self, signals):
+        """
+        Add a batch of signals.
+
+        Args:
+            signals (list):     The signals to add, oldest first.
+        """
+        if self.window is not None or self.counts is None:
+            for signal in signals:
+                self.add(signal)
+            return
+
+        if signals:
+            counts = count_signals(signals)
+            if counts.shape != self.counts.shape:
+                raise ValueError('Expected signals of length {}'
+                                 .format(len(self._columns)))
+            self.counts += counts
+
+    @property
+    def messages(self):
+        """
+        The current messages.
+
+        Returns:
+            tuple - (most common message, least common message), empty
+                strings if there are no signals yet.
+        """
+        if not len(self):
+            return '', ''
+        return decode_messages(self.counts)
+
+    @property
+    def most_common(self):
+        return self.messages[0]
+
+    @property
+    def least_common(self):
+        return self.messages[1]
+
+
 def main():
     """
     Main.
@@ -112,10 +385,22 @@ def main():
     except IndexError:
         input_file = DEFAULT_INPUT
 
-    signals = read_input(input_file)
-
-    print('Part One: {}'.format(decode_message_most_common(signals)))
-    print('Part Two: {}'.format(decode_message_least_common(signals)))
+    # An optional second argument sets the number of worker processes.
+    try:
+        processes = int(sys.argv[2])
+    except IndexError:
+        processes = 1
+
+    if np is not None:
+        counts = count_signals_file(input_file, processes or None)
+        most_common, least_common = decode_messages(counts)
+    else:
+        signals = read_input(input_file)
+        most_common = decode_message_most_common(signals)
+        least_common = decode_message_least_common(signals)
+
+    print('Part One: {}'.format(most_common))
+    print('Part Two: {}'.format(least_common))
 
 
 if __name__ == '__main__':
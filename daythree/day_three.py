@@ -31,7 +31,14 @@ from __future__ import print_function
 import sys
 from itertools import permutations
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 INPUT = 'input.txt'
+PARTIAL_GROUP_ERROR = ("{} rows can't be read as column triangles, the row "
+                       'count must be a multiple of 3')
 
 
 def valid_triangle(sides):
@@ -98,6 +105,56 @@ def read_input(fpath):
     return rows, columns
 
 
+def read_input_array(fpath):
+    """
+    Read an input file into arrays of triangles, one per row of the
+        file and one per group of three within each column. The file
+        is parsed once, into a single buffer, and both arrays are views
+        of it. A .npy file of shape (N, 3) is memory-mapped instead of
+        parsed.
+
+    Args:
+        fpath (str):    File path of the file to read.
+
+    Returns:
+        tuple of arrays:
+            (rows, columns), rows of shape (N, 3) and columns of shape
+                (3, N / 3, 3), indexed by column, group of three rows,
+                then side.
+    """
+    if fpath.endswith('.npy'):
+        rows = np.load(fpath, mmap_mode='r')
+    else:
+        rows = np.fromfile(fpath, dtype=np.int64, sep=' ').reshape(-1, 3)
+
+    if len(rows) % 3:
+        raise ValueError(PARTIAL_GROUP_ERROR.format(len(rows)))
+
+    # Every three rows make a 3x3 block; a block's columns are triangles.
+    columns = rows.reshape(-1, 3, 3).transpose(2, 0, 1)
+
+    return rows, columns
+
+
+def count_valid_triangles_array(triangles):
+    """
+    Count the valid triangles in an array of triangles. Once each
+        triangle's sides are sorted, only the two shortest sides need
+        to be checked against the longest.
+
+    Args:
+        triangles (array):  Array with the sides of each triangle
+                                along its last axis, e.g. (N, 3).
+
+    Returns:
+        int
+    """
+    sides = np.sort(triangles, axis=-1)
+    return int(np.count_nonzero(
+        sides[..., 0] + sides[..., 1] > sides[..., 2]
+    ))
+
+
 def count_valid_triangles(triangles):
     """
     Given a list of possible triangles, return a count of the number of
@@ -117,14 +174,60 @@ def count_valid_triangles(triangles):
     return count
 
 
+def count_valid_triangles_streaming(fpath):
+    """
+    Count the valid row and column triangles in a file while reading it
+        line by line. Column triangles only span three rows, so only
+        those three rows are ever held in memory. Raises ValueError if
+        the rows don't divide into groups of three.
+
+    Args:
+        fpath (str):    File path of the file to read.
+
+    Returns:
+        tuple:
+            (rows, columns), the number of valid triangles of each kind.
+    """
+    rows = 0
+    columns = 0
+    rows_read = 0
+    window = []
+    with open(fpath, 'r') as f:
+        for line in f:
+            sides = tuple(map(int, line.split()))
+            if not sides:
+                continue
+            rows_read += 1
+
+            if valid_triangle(sides):
+                rows += 1
+
+            window.append(sides)
+            if len(window) == 3:
+                for column in zip(*window):
+                    if valid_triangle(column):
+                        columns += 1
+                window = []
+
+    if window:
+        raise ValueError(PARTIAL_GROUP_ERROR.format(rows_read))
+
+    return rows, columns
+
+
 def main():
     """
     Main
     """
-    rows, columns = read_input(INPUT)
-
-    print('Rows: {0}'.format(count_valid_triangles(rows)))
-    print('Columns: {0}'.format(count_valid_triangles(columns)))
+    if np is not None:
+        rows, columns = read_input_array(INPUT)
+        rows = count_valid_triangles_array(rows)
+        columns = count_valid_triangles_array(columns)
+    else:
+        rows, columns = count_valid_triangles_streaming(INPUT)
+
+    print('Rows: {0}'.format(rows))
+    print('Columns: {0}'.format(columns))
 
 
 if __name__ == '__main__':